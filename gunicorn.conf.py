@@ -0,0 +1,27 @@
+"""Gunicorn configuration for the Syncro ticket processor.
+
+preload_app imports the application once in the master process, so the
+when_ready hook can start the hourly fallback poller there — exactly one
+poller per deployment instead of one per worker (or none at all, since
+main() never runs under gunicorn).
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = 4
+preload_app = True
+
+def when_ready(server):
+    """Run the catch-up pass and fallback poll once, in the master process."""
+    from syncro_ticket_processor import start_fallback_poller
+    start_fallback_poller()
+
+def post_fork(server, worker):
+    """Rebuild state a worker must not share with the master.
+
+    The master's poller may have opened the sqlite connection and HTTP
+    session before the fork, and its log listener thread does not survive
+    it; reset_after_fork() gives this worker its own copies.
+    """
+    from syncro_ticket_processor import reset_after_fork
+    reset_after_fork()
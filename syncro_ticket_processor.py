@@ -1,22 +1,60 @@
 import os
+import re
 import csv
-import json
+import atexit
+import orjson
+from collections import defaultdict, namedtuple
 import time
+import queue
 import logging
+import sqlite3
+import threading
+from logging.handlers import QueueHandler, QueueListener
 import schedule
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
+from flask import Flask, request, jsonify
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('syncro_processor.log'),
-        logging.StreamHandler()
-    ]
-)
+# Set up logging: the hot loop only enqueues records, a background listener
+# thread does the actual file/console writes. The QueueHandler is attached
+# bare (no basicConfig) so it doesn't pick up a formatter of its own —
+# otherwise prepare() bakes its formatting into the message and the
+# listener-side handlers format it a second time.
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_file_handler = logging.FileHandler('syncro_processor.log')
+_file_handler.setFormatter(_log_formatter)
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(_log_formatter)
+
+_log_queue = None
+_log_listener = None
+
+def _start_log_listener():
+    """(Re)build the log queue, queue handler, and listener for this process.
+
+    Called at import and again after a fork: the inherited queue's condition
+    waiters still point at the dead parent thread, so a forked worker needs
+    a fresh queue, not a restarted listener on the old one.
+    """
+    global _log_queue, _log_listener
+    _log_queue = queue.Queue(-1)
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    for handler in list(root.handlers):
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(QueueHandler(_log_queue))
+    _log_listener = QueueListener(_log_queue, _file_handler, _stream_handler)
+    _log_listener.start()
+    # Drain the queue at exit; the listener is a daemon thread, so without
+    # this any records still queued when the process ends are dropped
+    atexit.register(_log_listener.stop)
+
+_start_log_listener()
 
 # Load environment variables
 load_dotenv()
@@ -24,145 +62,360 @@ load_dotenv()
 # Configuration
 SYNCRO_API_URL = 'https://cloudavize.syncromsp.com/api/v1'
 SYNCRO_API_KEY = os.getenv('SYNCRO_API_KEY')
+TEAMS_WEBHOOK_URL = os.getenv('TEAMS_WEBHOOK_URL')
+NOTIFICATION_WORKERS = 8
 MAPPING_FILE = 'technician_mapping.json'
-ASSIGNMENT_RESULTS_FILE = 'assignment_results.json'
+ASSIGNMENT_RESULTS_FILE = 'assignment_results.jsonl'
+LAST_SYNC_FILE = 'last_sync.txt'
+PROCESSED_DB_FILE = 'processed.db'
+PAGE_SIZE = 25
+BATCH_CAP = 50
+
+# Lazily-opened sqlite connection tracking which tickets we already handled.
+# The connection is shared across threads (poller + Flask request threads),
+# so writes are serialized with a lock: an explicit BEGIN on a shared
+# connection otherwise collides with a concurrent autocommit INSERT or a
+# second BEGIN from another thread.
+_DB = None
+_DB_LOCK = threading.Lock()
+
+def _get_db():
+    """Open (once) the sqlite database tracking processed tickets."""
+    global _DB
+    if _DB is None:
+        _DB = sqlite3.connect(PROCESSED_DB_FILE, check_same_thread=False,
+                              isolation_level=None)
+        _DB.execute('CREATE TABLE IF NOT EXISTS processed (id TEXT PRIMARY KEY, ts TEXT)')
+        _DB.execute('CREATE TABLE IF NOT EXISTS level1_counts (name TEXT PRIMARY KEY, n INTEGER)')
+    return _DB
+
+def is_processed(ticket_id):
+    """Check whether a ticket has already been processed."""
+    cur = _get_db().execute('SELECT 1 FROM processed WHERE id = ?', (str(ticket_id),))
+    return cur.fetchone() is not None
+
+def mark_processed(ticket_id):
+    """Record a ticket as processed, committing immediately for crash safety."""
+    with _DB_LOCK:
+        _get_db().execute('INSERT OR IGNORE INTO processed (id, ts) VALUES (?, ?)',
+                          (str(ticket_id), datetime.now().isoformat()))
+
+def pick_balanced_technician(candidates):
+    """Pick the candidate with the fewest Level 1 assignments and count it.
+
+    The counters are persisted in sqlite so fairness survives restarts and
+    concurrent pickers: the lock serializes threads sharing this connection,
+    BEGIN IMMEDIATE serializes other processes, and ties are broken randomly
+    inside the transaction.
+    """
+    names = [c.technician for c in candidates]
+    placeholders = ','.join('?' * len(names))
+    with _DB_LOCK:
+        db = _get_db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.executemany('INSERT OR IGNORE INTO level1_counts (name, n) VALUES (?, 0)',
+                           [(name,) for name in names])
+            row = db.execute(
+                f'SELECT name FROM level1_counts WHERE name IN ({placeholders}) '
+                'ORDER BY n ASC, RANDOM() LIMIT 1', names).fetchone()
+            db.execute('UPDATE level1_counts SET n = n + 1 WHERE name = ?', (row[0],))
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+    return next(c for c in candidates if c.technician == row[0])
+
+# Shared HTTP session: keep-alive avoids a new TCP/TLS handshake per call,
+# and the retry adapter backs off on transient 5xx/429 responses
+def _build_session():
+    """Build the shared HTTP session with keep-alive and the retry adapter."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=10,
+        max_retries=Retry(total=3, backoff_factor=0.3,
+                          status_forcelist=[429, 500, 502, 503, 504])
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Accept': 'application/json'})
+    return session
+
+_SESSION = _build_session()
+
+def reset_after_fork():
+    """Re-create per-process state in a forked worker (gunicorn post_fork).
+
+    With preload_app the master imports the module and its poller opens the
+    sqlite connection and HTTP session before workers fork. Neither survives
+    a fork safely: sqlite forbids using a connection across processes, and
+    pooled sockets would be shared. The reference is dropped without close()
+    — the descriptor still belongs to the master. The QueueListener thread
+    also dies in the fork, so logging is rebuilt on a fresh queue or webhook
+    log records would queue forever unwritten.
+    """
+    global _DB, _SESSION
+    _DB = None
+    _SESSION = _build_session()
+    _start_log_listener()
+
+# Cache of the parsed mapping file, keyed by its mtime so edits are picked up
+_MAPPING_CACHE = {'mtime': None, 'value': None}
+
+DAYS_ORDER = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+# Schedule entries are namedtuples so the hot path uses attribute offsets
+# instead of dict lookups
+Entry = namedtuple('Entry', [
+    'category', 'technician', 'teams_mention', 'email',
+    'days', 'start_time', 'end_time',
+    'day_mask', 'start_min', 'end_min', 'overnight'
+])
+
+def parse_minutes(time_str):
+    """Convert an 'HH:MM' string to minutes since midnight."""
+    hours, minutes = time_str.split(':')
+    return int(hours) * 60 + int(minutes)
+
+def build_day_mask(days):
+    """Convert a day range like 'Mon-Fri' to a 7-bit mask (bit 0 = Monday)."""
+    start_day, end_day = days.split('-')
+    start_idx = DAYS_ORDER.index(start_day)
+    end_idx = DAYS_ORDER.index(end_day)
+
+    mask = 0
+    # Handle wrap-around ranges (e.g., Fri-Mon)
+    if end_idx < start_idx:
+        indexes = list(range(start_idx, 7)) + list(range(end_idx + 1))
+    else:
+        indexes = range(start_idx, end_idx + 1)
+    for idx in indexes:
+        mask |= 1 << idx
+    return mask
 
 def load_technician_mapping():
     """Load technician mapping from JSON file."""
-    with open(MAPPING_FILE, 'r') as f:
-        data = json.load(f)
-    
-    # Convert JSON structure to list of schedule entries
+    st = os.stat(MAPPING_FILE)
+    if st.st_mtime_ns == _MAPPING_CACHE['mtime']:
+        return _MAPPING_CACHE['value']
+
+    with open(MAPPING_FILE, 'rb') as f:
+        data = orjson.loads(f.read())
+
+    # Convert JSON structure to list of schedule entries, indexed by category
     mapping = []
+    by_category = defaultdict(list)
     for tech_name, tech_info in data['technicians'].items():
         for schedule in tech_info['schedules']:
             for category in schedule['categories']:
-                mapping.append({
-                    'category': category,
-                    'technician': tech_name,
-                    'teams_mention': tech_info['teams_mention'],
-                    'email': tech_info['email'],
-                    'days': schedule['days'],
-                    'start_time': schedule['start_time'],
-                    'end_time': schedule['end_time']
-                })
-    return mapping, data['category_mapping']
-
-def get_last_processed_timestamp():
-    """Get the timestamp of the last processed ticket."""
+                start_min = parse_minutes(schedule['start_time'])
+                end_min = parse_minutes(schedule['end_time'])
+                entry = Entry(
+                    category=category,
+                    technician=tech_name,
+                    teams_mention=tech_info['teams_mention'],
+                    email=tech_info['email'],
+                    days=schedule['days'],
+                    start_time=schedule['start_time'],
+                    end_time=schedule['end_time'],
+                    day_mask=build_day_mask(schedule['days']),
+                    start_min=start_min,
+                    end_min=end_min,
+                    overnight=end_min < start_min
+                )
+                mapping.append(entry)
+                by_category[category].append(entry)
+
+    _MAPPING_CACHE['mtime'] = st.st_mtime_ns
+    _MAPPING_CACHE['value'] = (mapping, data['category_mapping'], by_category)
+    return _MAPPING_CACHE['value']
+
+def atomic_write(path, data):
+    """Write a file atomically: temp file, flush + fsync, then rename over.
+
+    A crash mid-write leaves the old file intact instead of a truncated one.
+    """
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def get_last_sync_timestamp():
+    """Get the timestamp of the last successful ticket sync."""
     try:
-        with open(LAST_PROCESSED_FILE, 'r') as f:
+        with open(LAST_SYNC_FILE, 'r') as f:
             return f.read().strip()
     except FileNotFoundError:
         # If file doesn't exist, use current time
         current_time = datetime.now().isoformat()
-        save_last_processed_timestamp(current_time)
+        save_last_sync_timestamp(current_time)
         return current_time
 
-def save_last_processed_timestamp(timestamp):
-    """Save the timestamp of the last processed ticket."""
-    with open(LAST_PROCESSED_FILE, 'w') as f:
-        f.write(timestamp)
+def save_last_sync_timestamp(timestamp):
+    """Save the timestamp of the last successful ticket sync."""
+    atomic_write(LAST_SYNC_FILE, timestamp)
 
 def get_new_tickets():
-    """Get new tickets from Syncro API."""
+    """Get new tickets from Syncro API, filtered and paginated server-side."""
     try:
-        response = requests.get(
-            f'{SYNCRO_API_URL}/tickets',
-            headers={'Accept': 'application/json'},
-            params={'api_key': SYNCRO_API_KEY}
-        )
-        response.raise_for_status()
-        
-        data = response.json()
-        tickets = data.get('tickets', []) if isinstance(data, dict) else data
-        
-        if not isinstance(tickets, list):
-            logging.error(f"Invalid tickets data format")
-            return []
-        
-        # Get all unresolved tickets
-        active_tickets = [t for t in tickets if isinstance(t, dict) 
-                        and t.get('status') != 'Resolved']
-        logging.info(f"Found {len(active_tickets)} active tickets")
-        
-        # Sort by created_at
-        return sorted(active_tickets, key=lambda x: x.get('created_at', ''))
-            
+        last_sync = get_last_sync_timestamp()
+        new_tickets = []
+        page = 1
+        while True:
+            response = _SESSION.get(
+                f'{SYNCRO_API_URL}/tickets',
+                params={
+                    'api_key': SYNCRO_API_KEY,
+                    'since_updated_at': last_sync,
+                    'status': 'New,In Progress,Waiting',
+                    'sort': 'created_at',
+                    'order': 'asc',
+                    # Explicit page size: the short-page loop terminator below
+                    # is only valid if the server pages by PAGE_SIZE
+                    'per_page': PAGE_SIZE,
+                    'page': page
+                }
+            )
+            response.raise_for_status()
+
+            # response.json() goes through stdlib json; decode the bytes directly
+            data = orjson.loads(response.content)
+            page_tickets = data.get('tickets', []) if isinstance(data, dict) else data
+
+            if not isinstance(page_tickets, list):
+                logging.error(f"Invalid tickets data format")
+                return []
+
+            # Filter each page as it arrives, stopping the pagination as soon
+            # as the batch is full: later pages hold newer tickets that the
+            # sync cursor has not passed, so the next poll picks them up.
+            for ticket in page_tickets:
+                # Keep the client-side status filter as a safety net
+                if not isinstance(ticket, dict) or ticket.get('status') == 'Resolved':
+                    continue
+                if is_processed(ticket.get('id')):
+                    continue
+                new_tickets.append(ticket)
+                if len(new_tickets) >= BATCH_CAP:
+                    logging.info(f"Batch cap reached with {len(new_tickets)} tickets")
+                    return new_tickets
+
+            if len(page_tickets) < PAGE_SIZE:
+                break
+            page += 1
+
+        logging.info(f"Found {len(new_tickets)} new tickets")
+        return new_tickets
+
     except Exception as e:
         logging.error(f"Failed to get tickets: {e}")
         return []
 
-def parse_time(time_str):
-    """Parse time string to time object."""
-    return datetime.strptime(time_str, '%H:%M').time()
-
-def is_time_in_schedule(current_time, current_day, schedule_days, start_time, end_time):
-    """Check if current time falls within the schedule."""
-    # Convert schedule days to list (e.g., 'Mon-Fri' -> ['Mon', 'Fri'])
-    schedule_range = schedule_days.split('-')
-    days_order = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-    start_idx = days_order.index(schedule_range[0])
-    end_idx = days_order.index(schedule_range[1])
-    
-    # Handle wrap-around schedules (e.g., Sun-Thu)
-    if end_idx < start_idx:
-        schedule_days = days_order[start_idx:] + days_order[:end_idx+1]
-    else:
-        schedule_days = days_order[start_idx:end_idx+1]
-    
-    if current_day not in schedule_days:
+def is_entry_active(entry, weekday, minute):
+    """Check if a schedule entry covers the given weekday and minute of day.
+
+    Day masks and minute ranges are precomputed in load_technician_mapping(),
+    so this is just a bit test and two integer compares.
+    """
+    if not (entry.day_mask & (1 << weekday)):
         return False
-        
-    # Convert times to comparable format using real datetime
-    current = parse_time(current_time)
-    start = parse_time(start_time)
-    end = parse_time(end_time)
-    
+
     # Handle overnight shifts (e.g., 16:30-01:30)
-    if end < start:
-        return current >= start or current <= end
-    else:
-        return start <= current <= end
+    if entry.overnight:
+        return minute >= entry.start_min or minute <= entry.end_min
+    return entry.start_min <= minute <= entry.end_min
+
+# Exact Syncro category -> internal category matches
+_CATEGORY_EXACT = {
+    'Remote Support': 'Level 1',  # Default remote support to Level 1
+    'Software': 'Software',
+    'Account Management': 'Account Management'
+}
+
+# Keyword fallback, compiled once so classification is a single regex scan
+_CATEGORY_RE = re.compile(
+    r'(?P<account>account|billing)'
+    r'|(?P<software>software|application)'
+    r'|(?P<hardware>hardware|printer)'
+    r'|(?P<network>network|wifi|internet)'
+    r'|(?P<server>server|cloud)'
+    r'|(?P<security>security|password)',
+    re.I
+)
+_GROUP_TO_NAME = {
+    'account': 'Account Management',
+    'software': 'Software',
+    'hardware': 'Level 2',
+    'network': 'Level 2',
+    'server': 'Level 2',
+    'security': 'Level 1'
+}
 
 def map_syncro_category(category):
     """Map Syncro ticket categories to our internal categories."""
-    category_mapping = {
-        'Remote Support': 'Level 1',  # Default remote support to Level 1
-        'Software': 'Software',
-        'Account Management': 'Account Management'
-    }
-    return category_mapping.get(category, category)
+    mapped = _CATEGORY_EXACT.get(category)
+    if mapped is not None:
+        return mapped
+    match = _CATEGORY_RE.search(category or '')
+    if match:
+        return _GROUP_TO_NAME[match.lastgroup]
+    return category
+
+def current_time_context():
+    """Return (weekday, minute of day) for schedule checks."""
+    now = datetime.now()
+    return now.weekday(), now.hour * 60 + now.minute
+
+def assign_technician(ticket, mapping_data, time_ctx=None):
+    """Assign technician based on ticket category and time.
+
+    time_ctx is a (weekday, minute of day) tuple; callers processing a batch
+    should compute it once via current_time_context() and pass it in.
+    """
+    mappings, category_mapping, by_category = mapping_data
+
+    weekday, minute = time_ctx if time_ctx is not None else current_time_context()
 
-def assign_technician(ticket, mapping_data):
-    """Assign technician based on ticket category and time."""
-    mappings, category_mapping = mapping_data
-    
-    # Get current time in the format used in the mapping
-    current_time = datetime.now().strftime('%H:%M')
-    current_day = datetime.now().strftime('%a')
-    
     # First, check for time-based assignments (weekend/after-hours)
-    for mapping in mappings:
-        if mapping['category'] == 'All' and is_time_in_schedule(current_time, current_day, mapping['days'], mapping['start_time'], mapping['end_time']):
+    for mapping in by_category.get('All', []):
+        if is_entry_active(mapping, weekday, minute):
             return {
-                'technician': mapping['technician'],
-                'teams_mention': mapping['teams_mention'],
-                'email': mapping['email']
+                'technician': mapping.technician,
+                'teams_mention': mapping.teams_mention,
+                'email': mapping.email
             }
-    
+
     # If not in special time periods, check regular category assignments
     ticket_category = ticket.get('problem_type', '')
     category = category_mapping.get(ticket_category, ticket_category)
-    
-    for mapping in mappings:
-        if mapping['category'] == category and is_time_in_schedule(current_time, current_day, mapping['days'], mapping['start_time'], mapping['end_time']):
+
+    entries = by_category.get(category, [])
+    if category == 'Level 1':
+        # Only the load-balanced path needs the full candidate list
+        candidates = [m for m in entries if is_entry_active(m, weekday, minute)]
+        if candidates:
+            if len(candidates) > 1:
+                chosen = pick_balanced_technician(candidates)
+            else:
+                chosen = candidates[0]
             return {
-                'technician': mapping['technician'],
-                'teams_mention': mapping['teams_mention'],
-                'email': mapping['email']
+                'technician': chosen.technician,
+                'teams_mention': chosen.teams_mention,
+                'email': chosen.email
             }
-    
+    else:
+        # First available technician wins; stop scanning immediately
+        for mapping in entries:
+            if is_entry_active(mapping, weekday, minute):
+                return {
+                    'technician': mapping.technician,
+                    'teams_mention': mapping.teams_mention,
+                    'email': mapping.email
+                }
+
     return {'technician': 'Needs human input', 'teams_mention': None, 'email': None}
 
 # TODO: Currently disabled - read-only mode
@@ -185,8 +438,35 @@ def assign_technician(ticket, mapping_data):
 #     )
 #     response.raise_for_status()
 
+class ResultsBuffer:
+    """Buffer assignment results in memory and flush them in a single write."""
+
+    def __init__(self):
+        self._records = []
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self._records.append(record)
+
+    def flush(self):
+        with self._lock:
+            records, self._records = self._records, []
+        if not records:
+            return
+        try:
+            with open(ASSIGNMENT_RESULTS_FILE, 'ab') as f:
+                for record in records:
+                    f.write(orjson.dumps(record) + b'\n')
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            logging.error(f"Error saving assignment results: {str(e)}")
+
+_RESULTS_BUFFER = ResultsBuffer()
+
 def save_assignment_result(ticket, assignment):
-    """Save the ticket assignment result to a JSON file."""
+    """Buffer a ticket assignment result for the next flush."""
     result = {
         'ticket_id': ticket.get('id'),
         'ticket_number': ticket.get('number'),
@@ -200,23 +480,44 @@ def save_assignment_result(ticket, assignment):
         'priority': ticket.get('priority')
     }
     
+    _RESULTS_BUFFER.add(result)
+
+def load_results():
+    """Yield saved assignment results from the JSONL file, one at a time."""
     try:
-        # Load existing results
-        if os.path.exists(ASSIGNMENT_RESULTS_FILE):
-            with open(ASSIGNMENT_RESULTS_FILE, 'r') as f:
-                results = json.load(f)
-        else:
-            results = []
-        
-        # Add new result
-        results.append(result)
-        
-        # Save back to file
-        with open(ASSIGNMENT_RESULTS_FILE, 'w') as f:
-            json.dump(results, f, indent=2)
-            
+        with open(ASSIGNMENT_RESULTS_FILE, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield orjson.loads(line)
+    except FileNotFoundError:
+        return
+
+def send_teams_notification(ticket, assignment):
+    """Send a Teams notification for an assigned ticket."""
+    if not TEAMS_WEBHOOK_URL:
+        return
+    mention = assignment.get('teams_mention') or assignment['technician']
+    message = {
+        'text': f"Ticket #{ticket.get('number')} ({ticket.get('subject')}) "
+                f"assigned to {mention}"
+    }
+    try:
+        response = _SESSION.post(TEAMS_WEBHOOK_URL, json=message, timeout=10)
+        response.raise_for_status()
     except Exception as e:
-        print(f"Error saving assignment result: {str(e)}")
+        logging.error(f"Failed to send Teams notification for ticket {ticket.get('id', 'Unknown')}: {e}")
+
+def _send_one(pair):
+    send_teams_notification(*pair)
+
+def send_notifications(pairs):
+    """Send Teams notifications for a batch of (ticket, assignment) pairs in parallel."""
+    if not pairs or not TEAMS_WEBHOOK_URL:
+        return
+    with ThreadPoolExecutor(max_workers=NOTIFICATION_WORKERS) as pool:
+        # The notifications are independent blocking POSTs, so they overlap cleanly
+        list(pool.map(_send_one, pairs))
 
 def process_tickets():
     """Main function to process new tickets."""
@@ -232,42 +533,119 @@ def process_tickets():
         if not unassigned_tickets:
             return
         
-        # Process each ticket
+        # Compute the schedule context once for the whole batch
+        time_ctx = current_time_context()
+
+        # Process each ticket, collecting notifications to send in parallel.
+        # The sync cursor only advances past tickets that were actually
+        # processed: tickets arrive sorted by created_at ascending, so the
+        # first failure pins the cursor and everything from there on is
+        # refetched on the next poll (is_processed dedupes the successes).
+        notifications = []
+        cursor = None
+        cursor_pinned = False
         for ticket in unassigned_tickets:
             try:
                 # Assign technician
-                assignment = assign_technician(ticket, mapping)
+                assignment = assign_technician(ticket, mapping, time_ctx)
                 if not assignment:
+                    # Not marked processed, so don't let the cursor pass it
+                    cursor_pinned = True
                     continue
-                
+
                 # TODO: Update ticket in Syncro (currently disabled - read-only mode)
                 # if assignment['technician'] != 'Needs human input':
                 #     update_ticket_assignment(ticket['id'], assignment['technician'])
-                
+
                 # Save assignment result
                 save_assignment_result(ticket, assignment)
+                mark_processed(ticket.get('id'))
+                if assignment['technician'] != 'Needs human input':
+                    notifications.append((ticket, assignment))
+                if not cursor_pinned and ticket.get('created_at'):
+                    cursor = ticket['created_at']
                 logging.info(f"Processed ticket #{ticket.get('number')}: Assigned to {assignment['technician']}")
-                    
+
             except Exception as e:
+                cursor_pinned = True
                 logging.error(f"Error processing ticket {ticket.get('id', 'Unknown')}: {str(e)}")
-                
+
+        if cursor:
+            save_last_sync_timestamp(cursor)
+        send_notifications(notifications)
+
     except Exception as e:
         logging.error(f"Error in process_tickets: {str(e)}")
+    finally:
+        # One write + fsync for the whole batch
+        _RESULTS_BUFFER.flush()
 
-def main():
-    """Main entry point."""
-    logging.info("Starting Syncro ticket processor")
-    
-    # Schedule the job to run every 5 minutes
-    schedule.every(5).minutes.do(process_tickets)
-    
-    # Run immediately on startup
+# Flask app - Syncro calls us when a ticket is created instead of us polling
+app = Flask(__name__)
+
+@app.route('/syncro/ticket-created', methods=['POST'])
+def handle_ticket_created():
+    """Handle a Syncro "New Ticket" webhook and assign the single ticket."""
+    payload = request.get_json(silent=True)
+    if not payload or not isinstance(payload, dict):
+        return jsonify({'error': 'Invalid JSON payload'}), 400
+
+    # Syncro wraps the ticket in a 'ticket' key; accept a bare ticket too
+    ticket = payload.get('ticket', payload)
+    if not isinstance(ticket, dict):
+        return jsonify({'error': 'Invalid JSON payload'}), 400
+
+    try:
+        if is_processed(ticket.get('id')):
+            return jsonify({'status': 'already processed'}), 200
+
+        mapping = load_technician_mapping()
+        assignment = assign_technician(ticket, mapping)
+        save_assignment_result(ticket, assignment)
+        _RESULTS_BUFFER.flush()
+        mark_processed(ticket.get('id'))
+        if assignment['technician'] != 'Needs human input':
+            send_teams_notification(ticket, assignment)
+        logging.info(f"Webhook processed ticket #{ticket.get('number')}: Assigned to {assignment['technician']}")
+        return jsonify({'assigned_to': assignment['technician']}), 200
+    except Exception as e:
+        logging.error(f"Error handling webhook for ticket {ticket.get('id', 'Unknown')}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+def run_fallback_poller():
+    """Run a low-frequency poll as a safety net in case webhooks are missed."""
+    # Catch up on anything created before the webhook was registered
     process_tickets()
-    
-    # Keep the script running
+
+    schedule.every(1).hours.do(process_tickets)
     while True:
         schedule.run_pending()
-        time.sleep(1)
+        time.sleep(30)
+
+_poller_thread = None
+
+def start_fallback_poller():
+    """Start the catch-up pass and hourly fallback poll on a daemon thread.
+
+    Idempotent, so the process only ever runs one poller no matter how many
+    times it is called. Under gunicorn this is invoked from the when_ready
+    hook in gunicorn.conf.py, which runs once in the master process.
+    """
+    global _poller_thread
+    if _poller_thread is not None:
+        return
+    _poller_thread = threading.Thread(target=run_fallback_poller, daemon=True)
+    _poller_thread.start()
+
+def main():
+    """Main entry point."""
+    logging.info("Starting Syncro ticket processor")
+
+    # Hourly fallback poll in case a webhook delivery is missed
+    start_fallback_poller()
+
+    # Serve the webhook endpoint (use gunicorn in production)
+    app.run(host='0.0.0.0', port=int(os.getenv('PORT', '8000')))
 
 if __name__ == "__main__":
     main()
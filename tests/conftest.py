@@ -1,6 +1,78 @@
 import os
 import sys
+import types
+import functools
+from pathlib import Path
+
+import pytest
 
 # Add project root to Python path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
+
+_HERE = Path(__file__).parent
+_SAMPLE_TICKETS_PATH = _HERE / 'test_data' / 'sample_tickets_unassigned.json'
+
+@pytest.fixture(scope="session")
+def sample_tickets():
+    """Sample ticket data, parsed once per test session."""
+    import orjson
+    with open(_SAMPLE_TICKETS_PATH, 'rb') as f:
+        return orjson.loads(f.read())
+
+@pytest.fixture(scope="session")
+def sample_mapping():
+    """Sample technician mapping data, parsed once per test session.
+
+    Wrapped in MappingProxyType so a test cannot mutate the shared copy.
+    """
+    import orjson
+    with open('technician_mapping.json', 'rb') as f:
+        return types.MappingProxyType(orjson.loads(f.read()))
+
+@pytest.fixture(scope="session")
+def stp():
+    """The module under test, imported lazily so collection stays cheap."""
+    import syncro_ticket_processor
+    return syncro_ticket_processor
+
+@pytest.fixture(scope="session")
+def sample_tickets_bytes(sample_tickets):
+    """Sample tickets pre-serialized once for registering HTTP mocks."""
+    import orjson
+    return orjson.dumps(sample_tickets)
+
+@pytest.fixture(scope="session")
+def tickets_response(sample_tickets_bytes, stp):
+    """A fully-built Response for the tickets endpoint, constructed once.
+
+    Passing the object to RequestsMock.add() skips the per-registration
+    header normalization and body encoding that the kwargs form performs.
+    """
+    import responses
+    return responses.Response(
+        method=responses.GET,
+        url=f"{stp.SYNCRO_API_URL}/tickets",
+        body=sample_tickets_bytes,
+        status=200,
+        content_type="application/json"
+    )
+
+@pytest.fixture(scope="session")
+def cached_mapping():
+    """Parsed technician mapping, loaded once per test session."""
+    import syncro_ticket_processor
+    return syncro_ticket_processor.load_technician_mapping()
+
+@pytest.fixture(scope="session", autouse=True)
+def memoized_mapping_loader():
+    """Memoize load_technician_mapping so repeat calls skip the disk entirely.
+
+    process_tickets() calls the loader internally, so this also covers the
+    integration tests, not just tests that take cached_mapping.
+    """
+    import syncro_ticket_processor
+    original = syncro_ticket_processor.load_technician_mapping
+    syncro_ticket_processor.load_technician_mapping = functools.lru_cache(maxsize=1)(original)
+    yield
+    syncro_ticket_processor.load_technician_mapping = original
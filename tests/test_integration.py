@@ -1,154 +1,182 @@
 import os
-import json
+import functools
 import pytest
-import responses
 from datetime import datetime
-from syncro_ticket_processor import (
-    get_new_tickets,
-    assign_technician,
-    save_assignment_result,
-    process_tickets,
-    load_technician_mapping,
-    SYNCRO_API_URL,
-    SYNCRO_API_KEY,
-    MAPPING_FILE,
-    ASSIGNMENT_RESULTS_FILE
-)
+from itertools import islice
+from freezegun import freeze_time
 
-@pytest.fixture
-def sample_tickets():
-    """Sample ticket data."""
-    test_data_path = os.path.join(os.path.dirname(__file__), 'test_data/sample_tickets_unassigned.json')
-    with open(test_data_path, 'r') as f:
-        return json.load(f)
-
-@pytest.fixture
-def sample_mapping():
-    """Sample technician mapping data."""
-    with open('technician_mapping.json', 'r') as f:
-        return json.load(f)
+@pytest.fixture(autouse=True)
+def isolated_state(stp, tmp_path, monkeypatch):
+    """Point the state files at a per-test tmp_path instead of the repo root.
 
-@pytest.fixture
-def clean_assignment_results():
-    # Clean up any existing results file
-    if os.path.exists(ASSIGNMENT_RESULTS_FILE):
-        os.remove(ASSIGNMENT_RESULTS_FILE)
+    Autouse, because any test can reach them indirectly: get_new_tickets
+    writes last_sync.txt and pick_balanced_technician bumps counters in
+    processed.db. Each test gets its own directory, so nothing is shared
+    between tests or xdist workers and pytest handles the cleanup.
+    """
+    monkeypatch.setattr(stp, 'ASSIGNMENT_RESULTS_FILE', str(tmp_path / 'assignment_results.jsonl'))
+    monkeypatch.setattr(stp, 'PROCESSED_DB_FILE', str(tmp_path / 'processed.db'))
+    monkeypatch.setattr(stp, 'LAST_SYNC_FILE', str(tmp_path / 'last_sync.txt'))
+    monkeypatch.setattr(stp, '_DB', None)
     yield
-    if os.path.exists(ASSIGNMENT_RESULTS_FILE):
-        os.remove(ASSIGNMENT_RESULTS_FILE)
-
-@responses.activate
-def test_get_new_tickets(sample_tickets):
-    # Mock Syncro API response
-    responses.add(
-        responses.GET,
-        f"{SYNCRO_API_URL}/tickets",
-        json=sample_tickets,
-        status=200
-    )
-    
+    # Close the per-test db connection before monkeypatch restores _DB
+    if stp._DB is not None:
+        stp._DB.close()
+        stp._DB = None
+
+@pytest.fixture(scope="module")
+def mocked_api(tickets_response):
+    """One RequestsMock for the module, reusing the pre-built Response."""
+    import responses
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(tickets_response)
+        yield rsps
+
+def test_get_new_tickets(sample_tickets, mocked_api, stp):
+
     # Get unassigned tickets
-    tickets = get_new_tickets()
+    tickets = stp.get_new_tickets()
     
     # Should get unassigned and unresolved tickets
-    unassigned_tickets = [t for t in tickets if t.get('user_id') is None]
-    assert len(unassigned_tickets) == 1  # One unassigned ticket in sample data
+    assert sum(1 for t in tickets if t.get('user_id') is None) == 1  # One unassigned ticket in sample data
 
     # Verify we can process Remote Support tickets
-    remote_support_tickets = [t for t in tickets if t.get('problem_type') == 'Remote Support']
-    assert len(remote_support_tickets) == 1
-    
+    assert sum(1 for t in tickets if t.get('problem_type') == 'Remote Support') == 1
+
     # Verify ticket details
-    ticket = remote_support_tickets[0]
+    ticket = next(t for t in tickets if t.get('problem_type') == 'Remote Support')
     assert ticket['subject'] == 'Cannot Access Email'
     assert ticket['status'] == 'New'
     assert ticket['problem_type'] == 'Remote Support'
 
-def test_assign_technician(sample_mapping, monkeypatch):
-    # Base ticket template
-    ticket = {
-        'id': 95105275,
-        'subject': 'Test Ticket',
-        'status': 'New',
-        'problem_type': 'Remote Support'
-    }
-    
-    # Mock datetime for testing
-    class MockDateTime:
-        @classmethod
-        def now(cls):
-            return cls.mock_now
-        
-        @classmethod
-        def strptime(cls, date_string, format):
-            return datetime.strptime(date_string, format)
-    
-    monkeypatch.setattr('syncro_ticket_processor.datetime', MockDateTime)
-    mapping = load_technician_mapping()
-    
-    # Test Matrix: Time Slots
-    time_slots = [
-        # Business Hours
-        {'time': datetime(2025, 5, 22, 10, 0), 'day': 'Thu', 'desc': 'Business Hours'},  # Thu 10 AM
-        {'time': datetime(2025, 5, 22, 16, 0), 'day': 'Thu', 'desc': 'Late Business Hours'},  # Thu 4 PM
-        # After Hours
-        {'time': datetime(2025, 5, 22, 17, 0), 'day': 'Thu', 'desc': 'Early After Hours'},  # Thu 5 PM
-        {'time': datetime(2025, 5, 22, 20, 0), 'day': 'Thu', 'desc': 'After Hours'},  # Thu 8 PM
-        {'time': datetime(2025, 5, 22, 1, 0), 'day': 'Thu', 'desc': 'Overnight'},  # Thu 1 AM
-        # Weekend Hours
-        {'time': datetime(2025, 5, 24, 9, 0), 'day': 'Sat', 'desc': 'Weekend Morning'},  # Sat 9 AM
-        {'time': datetime(2025, 5, 24, 14, 0), 'day': 'Sat', 'desc': 'Weekend Afternoon'},  # Sat 2 PM
-        {'time': datetime(2025, 5, 24, 18, 30), 'day': 'Sat', 'desc': 'Weekend Evening'},  # Sat 6:30 PM
-        # Edge Cases
-        {'time': datetime(2025, 5, 23, 16, 29), 'day': 'Fri', 'desc': 'Just Before After Hours'},  # Fri 4:29 PM
-        {'time': datetime(2025, 5, 23, 16, 31), 'day': 'Fri', 'desc': 'Just After After Hours Start'},  # Fri 4:31 PM
-    ]
-    
-    # Test Matrix: Categories
-    categories = [
-        {'type': 'Remote Support', 'business_hours_tech': ['Michael Barbin', 'Jomaree Lawsin']},
-        {'type': 'Software', 'business_hours_tech': ['Carl Tamayo']},
-        {'type': 'Account Management', 'business_hours_tech': ['Jomaree Lawsin']},
-        {'type': 'Unknown', 'business_hours_tech': ['Needs human input']}
-    ]
-    
-    # Run all combinations
-    for time_slot in time_slots:
-        MockDateTime.mock_now = time_slot['time']
-        
-        for category in categories:
-            ticket['problem_type'] = category['type']
-            assignment = assign_technician(ticket, mapping)
-            
-            # Business Hours Routing (Mon-Fri 8 AM - 5 PM)
-            if (time_slot['day'] in ['Mon', 'Tue', 'Wed', 'Thu', 'Fri'] and
-                time_slot['time'].hour >= 8 and time_slot['time'].hour < 16):
-                if category['type'] == 'Unknown':
-                    assert assignment['technician'] == 'Needs human input', \
-                        f"Failed: {category['type']} during {time_slot['desc']}"
-                    assert assignment['email'] is None
-                else:
-                    assert assignment['technician'] in category['business_hours_tech'], \
-                        f"Failed: {category['type']} during {time_slot['desc']}"
-                    assert assignment['email'].endswith('@cloudavize.com')
-            
-            # After Hours Routing (Sun-Thu 4:30 PM - 1:30 AM)
-            elif ((time_slot['day'] in ['Sun', 'Mon', 'Tue', 'Wed', 'Thu'] and
-                  time_slot['time'].hour >= 16 and time_slot['time'].minute >= 30) or
-                 (time_slot['day'] in ['Mon', 'Tue', 'Wed', 'Thu', 'Fri'] and
-                  time_slot['time'].hour < 1 and time_slot['time'].minute <= 30)):
-                assert assignment['technician'] == 'Jorenzo Lucero', \
-                    f"Failed: {category['type']} during {time_slot['desc']}"
-                assert assignment['email'] == 'jlucero@cloudavize.com'
-            
-            # Weekend Hours Routing (Fri-Mon 8 AM - 7 PM)
-            elif (time_slot['day'] in ['Fri', 'Sat', 'Sun', 'Mon'] and
-                  time_slot['time'].hour >= 8 and time_slot['time'].hour < 19):
-                assert assignment['technician'] == 'Carl Lim', \
-                    f"Failed: {category['type']} during {time_slot['desc']}"
-                assert assignment['email'] == 'clim@cloudavize.com'
-
-def test_save_assignment_result(clean_assignment_results):
+# Test Matrix: Time Slots
+TIME_SLOTS = [
+    # Business Hours
+    {'time': datetime(2025, 5, 22, 10, 0), 'day': 'Thu', 'desc': 'Business Hours'},  # Thu 10 AM
+    {'time': datetime(2025, 5, 22, 16, 0), 'day': 'Thu', 'desc': 'Late Business Hours'},  # Thu 4 PM
+    # After Hours
+    {'time': datetime(2025, 5, 22, 17, 0), 'day': 'Thu', 'desc': 'Early After Hours'},  # Thu 5 PM
+    {'time': datetime(2025, 5, 22, 20, 0), 'day': 'Thu', 'desc': 'After Hours'},  # Thu 8 PM
+    {'time': datetime(2025, 5, 22, 1, 0), 'day': 'Thu', 'desc': 'Overnight'},  # Thu 1 AM
+    # Weekend Hours
+    {'time': datetime(2025, 5, 24, 9, 0), 'day': 'Sat', 'desc': 'Weekend Morning'},  # Sat 9 AM
+    {'time': datetime(2025, 5, 24, 14, 0), 'day': 'Sat', 'desc': 'Weekend Afternoon'},  # Sat 2 PM
+    {'time': datetime(2025, 5, 24, 18, 30), 'day': 'Sat', 'desc': 'Weekend Evening'},  # Sat 6:30 PM
+    # Edge Cases
+    {'time': datetime(2025, 5, 23, 16, 29), 'day': 'Fri', 'desc': 'Just Before After Hours'},  # Fri 4:29 PM
+    {'time': datetime(2025, 5, 23, 16, 31), 'day': 'Fri', 'desc': 'Just After After Hours Start'},  # Fri 4:31 PM
+]
+
+# Test Matrix: Categories
+CATEGORIES = [
+    {'type': 'Remote Support', 'business_hours_tech': ['Michael Barbin', 'Jomaree Lawsin']},
+    {'type': 'Software', 'business_hours_tech': ['Carl Tamayo']},
+    {'type': 'Account Management', 'business_hours_tech': ['Jomaree Lawsin']},
+    {'type': 'Unknown', 'business_hours_tech': ['Needs human input']}
+]
+
+# Routing rule day sets, matching the schedules in technician_mapping.json
+WEEKDAYS = frozenset({'Mon', 'Tue', 'Wed', 'Thu', 'Fri'})
+AFTER_HOURS_DAYS = frozenset({'Sun', 'Mon', 'Tue', 'Wed', 'Thu'})
+WEEKEND_DAYS = frozenset({'Fri', 'Sat', 'Sun', 'Mon'})
+
+def classify(slot):
+    """Determine which routing rule covers a slot, in assignment order.
+
+    The after-hours and weekend 'All' schedules are checked before category
+    routing, mirroring assign_technician. Minutes of day keep the 4:30 PM
+    and 1:30 AM boundaries exact.
+    """
+    minute = slot['time'].hour * 60 + slot['time'].minute
+    # After Hours (Sun-Thu 4:30 PM - 1:30 AM)
+    if slot['day'] in AFTER_HOURS_DAYS and (minute >= 990 or minute <= 90):
+        return 'after'
+    # Weekend Hours (Fri-Mon 8 AM - 7 PM)
+    if slot['day'] in WEEKEND_DAYS and 480 <= minute <= 1140:
+        return 'weekend'
+    # Business Hours (Mon-Fri 8 AM - 5 PM)
+    if slot['day'] in WEEKDAYS and 480 <= minute <= 1020:
+        return 'business'
+    return 'uncovered'
+
+for _slot in TIME_SLOTS:
+    _slot['expected_route'] = classify(_slot)
+
+# Shared ticket template; per-case dicts only vary in problem_type
+BASE_TICKET = {'id': 95105275, 'subject': 'Test Ticket', 'status': 'New'}
+
+# Cross product so each (slot, category) pair is its own test case
+PARAMS = [(ts, cat) for ts in TIME_SLOTS for cat in CATEGORIES]
+PARAM_IDS = [f"{ts['desc']}-{cat['type']}" for ts, cat in PARAMS]
+
+def _expected_assignment(slot, category):
+    """Apply the routing rules once, at table-build time."""
+    route = slot['expected_route']
+    if route == 'after':
+        return {'technicians': ('Jorenzo Lucero',), 'email': 'jlucero@cloudavize.com'}
+    if route == 'weekend':
+        return {'technicians': ('Carl Lim',), 'email': 'clim@cloudavize.com'}
+    if route == 'business':
+        if category['type'] == 'Unknown':
+            return {'technicians': ('Needs human input',), 'email': None}
+        return {'technicians': tuple(category['business_hours_tech']),
+                'email_suffix': '@cloudavize.com'}
+    return None
+
+# (slot desc, category type) -> expected assignment, computed once at import
+EXPECTED = {
+    (ts['desc'], cat['type']): _expected_assignment(ts, cat)
+    for ts, cat in PARAMS
+}
+
+# Opt-in memoization of assignment calls, keyed on (problem_type, slot).
+# Set ARDENCE_TEST_MEMOIZE=1 for fast --lf re-run loops; leave it off for
+# full first-run coverage of assign_technician.
+MEMOIZE_ASSIGN = os.environ.get('ARDENCE_TEST_MEMOIZE') == '1'
+_mapping_registry = {}
+
+@functools.lru_cache(maxsize=128)
+def _cached_assign(problem_type, slot_key, mapping_id):
+    import syncro_ticket_processor
+    ticket = {**BASE_TICKET, 'problem_type': problem_type}
+    with freeze_time(slot_key):
+        return syncro_ticket_processor.assign_technician(ticket, _mapping_registry[mapping_id])
+
+@pytest.fixture
+def ticket_for():
+    """Factory building a ticket for a category from the shared template."""
+    def _make(category):
+        return {**BASE_TICKET, 'problem_type': category['type']}
+    return _make
+
+@pytest.mark.parametrize("time_slot,category", PARAMS, ids=PARAM_IDS)
+def test_assign_technician(time_slot, category, cached_mapping, ticket_for, stp):
+    if MEMOIZE_ASSIGN:
+        _mapping_registry[id(cached_mapping)] = cached_mapping
+        assignment = _cached_assign(category['type'],
+                                    time_slot['time'].isoformat(),
+                                    id(cached_mapping))
+    else:
+        ticket = ticket_for(category)
+        with freeze_time(time_slot['time']):
+            assignment = stp.assign_technician(ticket, cached_mapping)
+
+    expected = EXPECTED[(time_slot['desc'], category['type'])]
+    if expected is None:
+        return  # slot not covered by any routing rule
+
+    assert assignment['technician'] in expected['technicians'], \
+        f"Failed: {category['type']} during {time_slot['desc']}"
+    if 'email_suffix' in expected:
+        assert assignment['email'].endswith(expected['email_suffix'])
+    else:
+        assert assignment['email'] == expected['email']
+
+def test_save_assignment_result(fs, stp):
+    # pyfakefs's fs fixture keeps the results file entirely in memory; the
+    # tmp_path directory isolated_state points at only exists on the real
+    # filesystem, so mirror it into the fake one
+    fs.create_dir(os.path.dirname(stp.ASSIGNMENT_RESULTS_FILE))
     ticket = {
         'id': 1,
         'number': 'T1001',
@@ -165,53 +193,44 @@ def test_save_assignment_result(clean_assignment_results):
     }
     
     # Save first assignment
-    save_assignment_result(ticket, assignment)
-    
-    # Verify file exists and content is correct
-    assert os.path.exists(ASSIGNMENT_RESULTS_FILE)
-    with open(ASSIGNMENT_RESULTS_FILE, 'r') as f:
-        results = json.load(f)
-    
-    assert len(results) == 1
-    assert results[0]['ticket_id'] == 1
-    assert results[0]['assigned_to'] == 'John Smith'
+    stp.save_assignment_result(ticket, assignment)
+    stp._RESULTS_BUFFER.flush()
+
+    # Verify file exists and content is correct, streaming one record at a time
+    assert os.path.exists(stp.ASSIGNMENT_RESULTS_FILE)
+    assert sum(1 for _ in stp.load_results()) == 1
+
+    first = next(stp.load_results())
+    assert first['ticket_id'] == 1
+    assert first['assigned_to'] == 'John Smith'
     
     # Save another assignment
     ticket['id'] = 2
     ticket['number'] = 'T1002'
-    save_assignment_result(ticket, assignment)
-    
+    stp.save_assignment_result(ticket, assignment)
+    stp._RESULTS_BUFFER.flush()
+
     # Verify both assignments are saved
-    with open(ASSIGNMENT_RESULTS_FILE, 'r') as f:
-        results = json.load(f)
-    
-    assert len(results) == 2
-    assert results[1]['ticket_id'] == 2
-
-@responses.activate
-def test_process_tickets_integration(sample_tickets, sample_mapping, clean_assignment_results):
-    # Mock Syncro API response
-    responses.add(
-        responses.GET,
-        f"{SYNCRO_API_URL}/tickets",
-        json=sample_tickets,
-        status=200
-    )
-    
+    assert sum(1 for _ in stp.load_results()) == 2
+    second = next(islice(stp.load_results(), 1, None))
+    assert second['ticket_id'] == 2
+
+def test_process_tickets_integration(mocked_api, sample_mapping, stp):
+
     # Process tickets
-    process_tickets()
-    
+    stp.process_tickets()
+
     # Verify assignments were saved
-    assert os.path.exists(ASSIGNMENT_RESULTS_FILE)
-    with open(ASSIGNMENT_RESULTS_FILE, 'r') as f:
-        results = json.load(f)
-    
-    # Verify we can process tickets
-    assert len(results) > 0
-    
-    # Verify the assignments have required fields
-    for result in results:
+    assert os.path.exists(stp.ASSIGNMENT_RESULTS_FILE)
+
+    # Stream the results once, verifying required fields as they come
+    count = 0
+    for result in stp.load_results():
+        count += 1
         assert 'ticket_number' in result
         assert 'category' in result
         assert 'assigned_to' in result
         assert 'subject' in result
+
+    # Verify we can process tickets
+    assert count > 0